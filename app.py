@@ -1,10 +1,10 @@
 """Fleet Scheduler — Device Deployment Planning Tool for Acoustiguide Japan."""
 import streamlit as st
+import numpy as np
 import pandas as pd
 import streamlit_authenticator as stauth
 from datetime import date, timedelta
 from src import database as db
-from src.charts import build_timeline_chart, build_capacity_chart
 from src.i18n import get_translations
 
 st.set_page_config(page_title="Fleet Scheduler", layout="wide")
@@ -24,13 +24,20 @@ T = get_translations("ja" if lang_option == "日本語" else "en")
 # Authentication
 # ---------------------------------------------------------------------------
 
-credentials = {"usernames": {k: dict(v) for k, v in st.secrets["credentials"]["usernames"].items()}}
-authenticator = stauth.Authenticate(
-    credentials,
-    st.secrets["auth"]["cookie_name"],
-    st.secrets["auth"]["cookie_key"],
-    cookie_expiry_days=30,
-)
+@st.cache_resource
+def _get_authenticator() -> stauth.Authenticate:
+    """Build the authenticator once per process instead of re-copying the
+    credentials dict on every rerun."""
+    credentials = {"usernames": {k: dict(v) for k, v in st.secrets["credentials"]["usernames"].items()}}
+    return stauth.Authenticate(
+        credentials,
+        st.secrets["auth"]["cookie_name"],
+        st.secrets["auth"]["cookie_key"],
+        cookie_expiry_days=30,
+    )
+
+
+authenticator = _get_authenticator()
 authenticator.login()
 
 if st.session_state.get("authentication_status") is False:
@@ -82,8 +89,25 @@ def render_dashboard(T: dict):
 
     today = date.today()
     monday = today - timedelta(days=today.weekday())
-    current_usage = db.get_fleet_usage_by_week(monday, monday)
-    usage_map = {r["device_type_id"]: r for r in current_usage}
+
+    # One query covers the whole dashboard: current week, 12-week alert
+    # horizon, and the 4-week table are all slices of the same range.
+    end_check = monday + timedelta(weeks=12)
+    udf = db.get_fleet_usage_by_week_df(monday, end_check)
+
+    if udf.empty:
+        usage_map = {}
+    else:
+        current_mask = udf["week_start"] == monday
+        usage_map = {r["device_type_id"]: r
+                     for r in udf.loc[current_mask].to_dict("records")}
+
+    # Shortage classification happens in SQL — only the problem rows come
+    # back, already tagged with severity; one pass partitions them.
+    alerts: list[dict] = []
+    warnings: list[dict] = []
+    for row in db.get_shortages(monday, end_check):
+        (alerts if row["severity"] == "alert" else warnings).append(row)
 
     # Fleet summary cards
     st.subheader(T["dash_current_week"])
@@ -102,11 +126,6 @@ def render_dashboard(T: dict):
 
     # Shortage alerts — next 12 weeks
     st.subheader(T["dash_shortage_alerts"])
-    end_check = monday + timedelta(weeks=12)
-    future_usage = db.get_fleet_usage_by_week(monday, end_check)
-
-    alerts = [r for r in future_usage if r["available"] < 0]
-    warnings = [r for r in future_usage if 0 <= r["available"] < r["total_fleet"] * 0.1]
 
     if alerts:
         for a in alerts:
@@ -128,10 +147,10 @@ def render_dashboard(T: dict):
 
     # Next 4 weeks table
     st.subheader(T["dash_next_4_weeks"])
-    next_4 = db.get_fleet_usage_by_week(monday, monday + timedelta(weeks=3))
-    if next_4:
-        df = pd.DataFrame(next_4)
-        df = df[["week_start", "device_type_name", "total_in_use", "total_fleet", "under_repair", "available"]]
+    cutoff = monday + timedelta(weeks=3)
+    next_4 = udf[udf["week_start"] <= cutoff] if not udf.empty else udf
+    if not next_4.empty:
+        df = next_4[["week_start", "device_type_name", "total_in_use", "total_fleet", "under_repair", "available"]]
         df.columns = [
             T["dash_col_week"], T["dash_col_device"], T["dash_col_in_use"],
             T["dash_col_fleet_total"], T["dash_col_under_repair"], T["dash_col_available"],
@@ -154,6 +173,24 @@ PERIOD_T_MAP = {
 }
 
 
+# Figure builds are cached on their inputs: reruns triggered by unrelated
+# widgets reuse the prebuilt figure instead of rebuilding + reserializing it.
+# src.charts is imported here rather than at module top so the plotly import
+# cost is only paid on the first Timeline visit, not on every cold start.
+
+@st.cache_data(ttl=120)
+def _timeline_fig(rows: list[dict], start_range: date, end_range: date, T: dict):
+    from src.charts import build_timeline_chart
+    return build_timeline_chart(rows, start_range, end_range, T)
+
+
+@st.cache_data(ttl=120)
+def _capacity_fig(usage_data: list[dict], device_types: list[dict],
+                  start_range: date, end_range: date, T: dict):
+    from src.charts import build_capacity_chart
+    return build_capacity_chart(usage_data, device_types, start_range, end_range, T)
+
+
 def render_timeline(T: dict):
     st.title(T["page_timeline"])
 
@@ -195,78 +232,222 @@ def render_timeline(T: dict):
     with filter_col2:
         search = st.text_input(T["tl_search"], "")
 
-    # Get deployments with project info
-    all_deployments = db.get_deployments()
-
-    # Enrich with project status and client
-    projects_map = {p["id"]: p for p in db.get_projects()}
-    for dep in all_deployments:
-        proj = projects_map.get(dep["project_id"], {})
-        dep["status"] = proj.get("status", "◎")
-        dep["client"] = proj.get("client", "")
-
-    # Apply filters
-    filtered = all_deployments
+    # All filters are pushed into SQL — only matching rows come back
+    dt_id = None
     if device_filter != "All":
-        filtered = [d for d in filtered if d.get("device_type_name") == device_filter]
-    filtered = [d for d in filtered if d.get("status") in status_filter]
-    if search:
-        search_lower = search.lower()
-        filtered = [d for d in filtered
-                    if search_lower in d.get("project_name", "").lower()
-                    or search_lower in d.get("venue", "").lower()]
-
-    # Filter by date overlap
-    filtered = [d for d in filtered
-                if date.fromisoformat(d["end_date"]) >= start_range
-                and date.fromisoformat(d["start_date"]) <= end_range]
-
-    # Aggregate filtered deployments by project × device type
-    agg = {}
-    for dep in filtered:
-        key = (dep["project_id"], dep.get("device_type_id", 0))
-        if key not in agg:
-            agg[key] = {
-                "project_id": dep["project_id"],
-                "project_name": dep.get("project_name", ""),
-                "device_type_id": dep.get("device_type_id"),
-                "device_type_name": dep.get("device_type_name", ""),
-                "color": dep.get("device_type_color", "#72B7B2"),
-                "status": dep.get("status", "◎"),
-                "client": dep.get("client", ""),
-                "start_date": dep["start_date"],
-                "end_date": dep["end_date"],
-                "total_count": dep["default_device_count"],
-                "deployments": [dep],
-            }
-        else:
-            entry = agg[key]
-            entry["start_date"] = min(entry["start_date"], dep["start_date"])
-            entry["end_date"] = max(entry["end_date"], dep["end_date"])
-            entry["total_count"] += dep["default_device_count"]
-            entry["deployments"].append(dep)
+        dt_id = next((dt["id"] for dt in device_types if dt["name"] == device_filter), None)
 
-    rows = sorted(agg.values(), key=lambda x: (x["start_date"], x["project_name"]))
+    filtered = db.get_deployments(
+        start=start_range,
+        end=end_range,
+        device_type_ids=[dt_id] if dt_id is not None else None,
+        statuses=status_filter,
+        search=search or None,
+    )
+
+    # Aggregate filtered deployments by project × device type — min/max/sum
+    # run as C-level groupby reductions instead of a per-row Python loop.
+    if filtered:
+        df = pd.DataFrame(filtered)
+        agg_df = df.groupby(["project_id", "device_type_id"], sort=False).agg(
+            project_name=("project_name", "first"),
+            device_type_name=("device_type_name", "first"),
+            color=("device_type_color", "first"),
+            status=("status", "first"),
+            client=("client", "first"),
+            start_date=("start_date", "min"),
+            end_date=("end_date", "max"),
+            total_count=("default_device_count", "sum"),
+        ).reset_index()
+        rows = agg_df.sort_values(["start_date", "project_name"]).to_dict("records")
+
+        # The hover detail still needs the underlying deployments per group
+        dep_lists: dict = {}
+        for dep in filtered:
+            dep_lists.setdefault((dep["project_id"], dep["device_type_id"]), []).append(dep)
+        for row in rows:
+            row["deployments"] = dep_lists[(row["project_id"], row["device_type_id"])]
+    else:
+        rows = []
 
-    # Gantt chart
-    fig = build_timeline_chart(rows, start_range, end_range, T)
-    st.plotly_chart(fig, use_container_width=True)
+    # Gantt chart — don't build/serialize an empty figure while the user
+    # is still typing a search term that matches nothing
+    if rows:
+        fig = _timeline_fig(rows, start_range, end_range, T)
+        st.plotly_chart(fig, use_container_width=True)
+    else:
+        st.info(T["chart_no_deps"])
 
     # Capacity chart
-    dt_id = None
-    if device_filter != "All":
-        dt_id = next((dt["id"] for dt in device_types if dt["name"] == device_filter), None)
-
     monday = start_range - timedelta(days=start_range.weekday())
     usage_data = db.get_fleet_usage_by_week(monday, end_range, dt_id)
-    cap_fig = build_capacity_chart(usage_data, device_types, start_range, end_range, T)
-    st.plotly_chart(cap_fig, use_container_width=True)
+    if usage_data:
+        cap_fig = _capacity_fig(usage_data, device_types, start_range, end_range, T)
+        st.plotly_chart(cap_fig, use_container_width=True)
+    else:
+        st.info(T["chart_no_usage"])
 
 
 # ---------------------------------------------------------------------------
 # Projects
 # ---------------------------------------------------------------------------
 
+@st.fragment
+def _render_project_block(proj: dict, deployments: list[dict], alloc_frames: dict,
+                          dt_name_to_id: dict, STATUS_LABELS: dict, T: dict):
+    """Render one project's expander as a fragment: interacting with its
+    widgets reruns only this block, not the whole Projects page."""
+    status_label = STATUS_LABELS.get(proj["status"], proj["status"])
+    archived_tag = f" {T['proj_archived_label']}" if proj.get("archived") else ""
+    with st.expander(f"{proj['status']} {proj['name']} — {proj['client']} ({status_label}){archived_tag}"):
+        # Edit project
+        with st.form(f"edit_proj_{proj['id']}"):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                ed_name = st.text_input(T["proj_name"], proj["name"], key=f"pn_{proj['id']}")
+                ed_client = st.text_input(T["proj_client"], proj["client"], key=f"pc_{proj['id']}")
+            with col2:
+                ed_name_en = st.text_input(T["proj_name_en_label"], proj["name_en"], key=f"pe_{proj['id']}")
+                ed_status = st.selectbox(
+                    T["proj_status"],
+                    STATUS_OPTIONS,
+                    index=STATUS_OPTIONS.index(proj["status"]),
+                    format_func=lambda x: STATUS_LABELS[x],
+                    key=f"ps_{proj['id']}",
+                )
+            with col3:
+                ed_notes = st.text_input(T["proj_notes"], proj["notes"], key=f"pno_{proj['id']}")
+
+            if proj.get("archived"):
+                c1, c2, c3 = st.columns([3, 1, 1])
+            else:
+                c1, c2 = st.columns([3, 1])
+            with c1:
+                if st.form_submit_button(T["proj_update_btn"]):
+                    db.update_project(proj["id"], name=ed_name, name_en=ed_name_en,
+                                      client=ed_client, status=ed_status, notes=ed_notes)
+                    st.success(T["proj_updated"])
+                    st.rerun(scope="app")
+            if proj.get("archived"):
+                with c2:
+                    if st.form_submit_button(T["proj_unarchive_btn"]):
+                        db.unarchive_project(proj["id"])
+                        st.rerun(scope="app")
+                with c3:
+                    if st.form_submit_button(T["proj_delete_btn"], type="secondary"):
+                        db.delete_project(proj["id"])
+                        st.success(T["proj_deleted"])
+                        st.rerun(scope="app")
+            else:
+                with c2:
+                    if st.form_submit_button(T["proj_archive_btn"], type="secondary"):
+                        db.archive_project(proj["id"])
+                        st.rerun(scope="app")
+
+        # Deployments for this project
+        st.markdown(T["proj_deployments"])
+
+        if deployments:
+            for dep in deployments:
+                dep_label = (f"{dep['venue']} ({dep['location']}) — "
+                             f"{dep['default_device_count']} {dep.get('device_type_name', '')} — "
+                             f"{dep['start_date']} → {dep['end_date']}")
+                col_dep, col_del = st.columns([5, 1])
+                with col_dep:
+                    st.text(dep_label)
+                with col_del:
+                    if st.button(T["proj_dep_delete_btn"], key=f"del_dep_{dep['id']}"):
+                        db.delete_deployment(dep["id"])
+                        st.rerun(scope="app")
+
+                # Weekly allocations editor — frame comes prebuilt from the db layer
+                alloc_df = alloc_frames.get(dep["id"])
+                if alloc_df is not None:
+                    edited = st.data_editor(
+                        alloc_df,
+                        column_config={
+                            "id": st.column_config.NumberColumn(T["proj_alloc_id"], disabled=True),
+                            "week_start": st.column_config.TextColumn(T["proj_alloc_week"], disabled=True),
+                            "device_count": st.column_config.NumberColumn(T["proj_alloc_devices"], min_value=0),
+                        },
+                        hide_index=True,
+                        key=f"alloc_{dep['id']}",
+                        use_container_width=True,
+                    )
+                    if st.button(T["proj_save_alloc_btn"], key=f"save_alloc_{dep['id']}"):
+                        # Only write rows the user actually changed, in one transaction
+                        orig = alloc_df.set_index("id")["device_count"]
+                        new = edited.set_index("id")["device_count"]
+                        diff = new[new != orig]
+                        db.update_weekly_allocations_batch(
+                            list(zip(diff.astype(int).tolist(), diff.index.astype(int).tolist()))
+                        )
+                        st.success(T["proj_alloc_saved"])
+                        st.rerun(scope="app")
+
+                # Bulk apply from date
+                with st.form(f"bulk_{dep['id']}"):
+                    st.caption(T["proj_bulk_caption"])
+                    ba1, ba2, ba3 = st.columns([2, 2, 1])
+                    with ba1:
+                        bulk_count = st.number_input(
+                            T["proj_bulk_count"],
+                            min_value=0,
+                            value=dep["default_device_count"],
+                            key=f"bc_{dep['id']}",
+                        )
+                    with ba2:
+                        bulk_from = st.date_input(
+                            T["proj_bulk_from"],
+                            value=date.today(),
+                            key=f"bf_{dep['id']}",
+                        )
+                    with ba3:
+                        st.write("")
+                        apply = st.form_submit_button(T["proj_bulk_apply"])
+                    if apply:
+                        db.bulk_update_allocations_from(dep["id"], bulk_count, bulk_from)
+                        st.success(f"{T['proj_bulk_apply']}: {bulk_count} — {bulk_from}")
+                        st.rerun(scope="app")
+        else:
+            st.caption(T["proj_no_deps"])
+
+        # Add deployment
+        with st.form(f"new_dep_{proj['id']}"):
+            st.markdown(T["proj_add_dep_title"])
+            dc1, dc2, dc3 = st.columns(3)
+            with dc1:
+                d_venue = st.text_input(T["proj_dep_venue"], key=f"dv_{proj['id']}")
+                d_location = st.text_input(T["proj_dep_location"], key=f"dl_{proj['id']}")
+            with dc2:
+                d_start = st.date_input(T["proj_dep_start"], key=f"ds_{proj['id']}")
+                d_end = st.date_input(T["proj_dep_end"], key=f"de_{proj['id']}")
+            with dc3:
+                d_device_type = st.selectbox(T["proj_dep_device_type"], list(dt_name_to_id.keys()),
+                                              key=f"ddt_{proj['id']}")
+                d_count = st.number_input(T["proj_dep_count"], min_value=0, value=0,
+                                          key=f"dc_{proj['id']}")
+            d_app = st.selectbox(T["proj_dep_app"], ["", "App", "Kikubi", "WebApp"],
+                                 key=f"da_{proj['id']}")
+
+            if st.form_submit_button(T["proj_dep_add_btn"]):
+                if d_venue and d_start and d_end and d_count > 0:
+                    db.create_deployment(
+                        project_id=proj["id"],
+                        venue=d_venue,
+                        location=d_location,
+                        start_date=d_start,
+                        end_date=d_end,
+                        device_type_id=dt_name_to_id[d_device_type],
+                        default_device_count=d_count,
+                        app_type=d_app,
+                    )
+                    st.success(f"{T['proj_dep_added']}: {d_venue}")
+                    st.rerun(scope="app")
+                else:
+                    st.error(T["proj_dep_fill_error"])
+
+
 def render_projects(T: dict):
     st.title(T["page_projects"])
 
@@ -329,11 +510,7 @@ def render_projects(T: dict):
     # --- Filters ---
     show_archived = st.checkbox(T["proj_show_archived"])
     all_deployments = db.get_deployments(include_archived=show_archived)
-    venues_by_project = {}
-    for dep in all_deployments:
-        venues_by_project.setdefault(dep["project_id"], []).append(
-            f"{dep['venue']} {dep.get('location', '')}".lower()
-        )
+    venue_blobs = db.get_project_venue_blobs()
 
     fcol1, fcol2 = st.columns([3, 2])
     with fcol1:
@@ -353,178 +530,42 @@ def render_projects(T: dict):
 
     # --- Load all data upfront (single queries, cached) ---
     projects = db.get_projects(include_archived=show_archived)
-    all_allocations = db.get_all_weekly_allocations()
 
     if not projects:
         st.info(T["proj_none"])
         return
 
+    # Vectorized filter: the lowercase haystack comes precomputed from the
+    # cached get_projects loader, so a keystroke costs one substring scan.
+    pdf = pd.DataFrame(projects)
+    pdf["_venues"] = pdf["id"].map(venue_blobs).fillna("")
+
+    mask = pdf["status"].isin(status_filter)
     search_lower = search.lower()
-    filtered_projects = [
-        p for p in projects
-        if p["status"] in status_filter
-        and (
-            not search_lower
-            or search_lower in p["name"].lower()
-            or search_lower in p.get("name_en", "").lower()
-            or search_lower in p.get("client", "").lower()
-            or search_lower in p.get("notes", "").lower()
-            or any(search_lower in v for v in venues_by_project.get(p["id"], []))
-        )
-    ]
+    if search_lower:
+        mask &= (pdf["_search"].str.contains(search_lower, regex=False)
+                 | pdf["_venues"].str.contains(search_lower, regex=False))
+    filtered_projects = pdf.loc[mask].drop(columns=["_search", "_venues"]).to_dict("records")
 
     if not filtered_projects:
         st.info(T["proj_no_match"])
         return
 
-    for proj in filtered_projects:
-        status_label = STATUS_LABELS.get(proj["status"], proj["status"])
-        archived_tag = f" {T['proj_archived_label']}" if proj.get("archived") else ""
-        with st.expander(f"{proj['status']} {proj['name']} — {proj['client']} ({status_label}){archived_tag}"):
-            # Edit project
-            with st.form(f"edit_proj_{proj['id']}"):
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    ed_name = st.text_input(T["proj_name"], proj["name"], key=f"pn_{proj['id']}")
-                    ed_client = st.text_input(T["proj_client"], proj["client"], key=f"pc_{proj['id']}")
-                with col2:
-                    ed_name_en = st.text_input(T["proj_name_en_label"], proj["name_en"], key=f"pe_{proj['id']}")
-                    ed_status = st.selectbox(
-                        T["proj_status"],
-                        STATUS_OPTIONS,
-                        index=STATUS_OPTIONS.index(proj["status"]),
-                        format_func=lambda x: STATUS_LABELS[x],
-                        key=f"ps_{proj['id']}",
-                    )
-                with col3:
-                    ed_notes = st.text_input(T["proj_notes"], proj["notes"], key=f"pno_{proj['id']}")
+    # Group deployments by project in one pass so each project block gets
+    # its own list instead of rescanning the full deployment list.
+    deps_by_project: dict[int, list[dict]] = {}
+    for d in all_deployments:
+        deps_by_project.setdefault(d["project_id"], []).append(d)
 
-                if proj.get("archived"):
-                    c1, c2, c3 = st.columns([3, 1, 1])
-                else:
-                    c1, c2 = st.columns([3, 1])
-                with c1:
-                    if st.form_submit_button(T["proj_update_btn"]):
-                        db.update_project(proj["id"], name=ed_name, name_en=ed_name_en,
-                                          client=ed_client, status=ed_status, notes=ed_notes)
-                        st.success(T["proj_updated"])
-                        st.rerun()
-                if proj.get("archived"):
-                    with c2:
-                        if st.form_submit_button(T["proj_unarchive_btn"]):
-                            db.unarchive_project(proj["id"])
-                            st.rerun()
-                    with c3:
-                        if st.form_submit_button(T["proj_delete_btn"], type="secondary"):
-                            db.delete_project(proj["id"])
-                            st.success(T["proj_deleted"])
-                            st.rerun()
-                else:
-                    with c2:
-                        if st.form_submit_button(T["proj_archive_btn"], type="secondary"):
-                            db.archive_project(proj["id"])
-                            st.rerun()
-
-            # Deployments for this project
-            st.markdown(T["proj_deployments"])
-            deployments = [d for d in all_deployments if d["project_id"] == proj["id"]]
-
-            if deployments:
-                for dep in deployments:
-                    dep_label = (f"{dep['venue']} ({dep['location']}) — "
-                                 f"{dep['default_device_count']} {dep.get('device_type_name', '')} — "
-                                 f"{dep['start_date']} → {dep['end_date']}")
-                    col_dep, col_del = st.columns([5, 1])
-                    with col_dep:
-                        st.text(dep_label)
-                    with col_del:
-                        if st.button(T["proj_dep_delete_btn"], key=f"del_dep_{dep['id']}"):
-                            db.delete_deployment(dep["id"])
-                            st.rerun()
-
-                    # Weekly allocations editor
-                    allocations = all_allocations.get(dep["id"], [])
-                    if allocations:
-                        alloc_df = pd.DataFrame(allocations)
-                        alloc_df["week_start"] = pd.to_datetime(alloc_df["week_start"]).dt.strftime("%Y-%m-%d")
-                        edited = st.data_editor(
-                            alloc_df[["id", "week_start", "device_count"]],
-                            column_config={
-                                "id": st.column_config.NumberColumn(T["proj_alloc_id"], disabled=True),
-                                "week_start": st.column_config.TextColumn(T["proj_alloc_week"], disabled=True),
-                                "device_count": st.column_config.NumberColumn(T["proj_alloc_devices"], min_value=0),
-                            },
-                            hide_index=True,
-                            key=f"alloc_{dep['id']}",
-                            use_container_width=True,
-                        )
-                        if st.button(T["proj_save_alloc_btn"], key=f"save_alloc_{dep['id']}"):
-                            for _, row in edited.iterrows():
-                                db.update_weekly_allocation(int(row["id"]), int(row["device_count"]))
-                            st.success(T["proj_alloc_saved"])
-                            st.rerun()
-
-                    # Bulk apply from date
-                    with st.form(f"bulk_{dep['id']}"):
-                        st.caption(T["proj_bulk_caption"])
-                        ba1, ba2, ba3 = st.columns([2, 2, 1])
-                        with ba1:
-                            bulk_count = st.number_input(
-                                T["proj_bulk_count"],
-                                min_value=0,
-                                value=dep["default_device_count"],
-                                key=f"bc_{dep['id']}",
-                            )
-                        with ba2:
-                            bulk_from = st.date_input(
-                                T["proj_bulk_from"],
-                                value=date.today(),
-                                key=f"bf_{dep['id']}",
-                            )
-                        with ba3:
-                            st.write("")
-                            apply = st.form_submit_button(T["proj_bulk_apply"])
-                        if apply:
-                            db.bulk_update_allocations_from(dep["id"], bulk_count, bulk_from)
-                            st.success(f"{T['proj_bulk_apply']}: {bulk_count} — {bulk_from}")
-                            st.rerun()
-            else:
-                st.caption(T["proj_no_deps"])
-
-            # Add deployment
-            with st.form(f"new_dep_{proj['id']}"):
-                st.markdown(T["proj_add_dep_title"])
-                dc1, dc2, dc3 = st.columns(3)
-                with dc1:
-                    d_venue = st.text_input(T["proj_dep_venue"], key=f"dv_{proj['id']}")
-                    d_location = st.text_input(T["proj_dep_location"], key=f"dl_{proj['id']}")
-                with dc2:
-                    d_start = st.date_input(T["proj_dep_start"], key=f"ds_{proj['id']}")
-                    d_end = st.date_input(T["proj_dep_end"], key=f"de_{proj['id']}")
-                with dc3:
-                    d_device_type = st.selectbox(T["proj_dep_device_type"], list(dt_name_to_id.keys()),
-                                                  key=f"ddt_{proj['id']}")
-                    d_count = st.number_input(T["proj_dep_count"], min_value=0, value=0,
-                                              key=f"dc_{proj['id']}")
-                d_app = st.selectbox(T["proj_dep_app"], ["", "App", "Kikubi", "WebApp"],
-                                     key=f"da_{proj['id']}")
-
-                if st.form_submit_button(T["proj_dep_add_btn"]):
-                    if d_venue and d_start and d_end and d_count > 0:
-                        db.create_deployment(
-                            project_id=proj["id"],
-                            venue=d_venue,
-                            location=d_location,
-                            start_date=d_start,
-                            end_date=d_end,
-                            device_type_id=dt_name_to_id[d_device_type],
-                            default_device_count=d_count,
-                            app_type=d_app,
-                        )
-                        st.success(f"{T['proj_dep_added']}: {d_venue}")
-                        st.rerun()
-                    else:
-                        st.error(T["proj_dep_fill_error"])
+    # Fetch allocations for the deployments we are about to render — one
+    # query scoped to the visible projects, not the whole table.
+    dep_ids = sorted(d["id"] for p in filtered_projects
+                     for d in deps_by_project.get(p["id"], []))
+    alloc_frames = db.get_allocation_frames(dep_ids)
+
+    for proj in filtered_projects:
+        _render_project_block(proj, deps_by_project.get(proj["id"], []),
+                              alloc_frames, dt_name_to_id, STATUS_LABELS, T)
 
 
 # ---------------------------------------------------------------------------
@@ -593,7 +634,7 @@ def render_fleet(T: dict):
     today = date.today()
     all_deps = db.get_deployments()
     active = [d for d in all_deps
-              if date.fromisoformat(d["start_date"]) <= today <= date.fromisoformat(d["end_date"])]
+              if d["start_date"] <= today <= d["end_date"]]
 
     if active:
         df = pd.DataFrame(active)
@@ -618,27 +659,29 @@ def render_fleet(T: dict):
 
     monday = today - timedelta(days=today.weekday())
     end = monday + timedelta(weeks=forecast_weeks)
-    forecast = db.get_fleet_usage_by_week(monday, end, forecast_dt["id"])
+    forecast = db.get_fleet_usage_by_week_df(monday, end, forecast_dt["id"])
 
     col_available = T["fleet_col_available"]
     col_fleet = T["fleet_col_fleet"]
 
-    if forecast:
-        df = pd.DataFrame(forecast)
-        df = df[["week_start", "total_in_use", "total_fleet", "under_repair", "available"]]
+    if not forecast.empty:
+        df = forecast[["week_start", "total_in_use", "total_fleet", "under_repair", "available"]]
         df.columns = [
             T["fleet_col_week"], T["fleet_col_in_use"], col_fleet,
             T["fleet_col_repair"], col_available,
         ]
 
-        def highlight_shortage(row):
-            if row[col_available] < 0:
-                return ["background-color: #ffcccc"] * len(row)
-            elif row[col_available] < row[col_fleet] * 0.1:
-                return ["background-color: #fff3cd"] * len(row)
-            return [""] * len(row)
-
-        st.dataframe(df.style.apply(highlight_shortage, axis=1),
+        # One vectorized Styler call over the whole table instead of a
+        # Python callback per row/column
+        def highlight_shortage(frame: pd.DataFrame) -> pd.DataFrame:
+            styles = np.full(frame.shape, "", dtype=object)
+            red = (frame[col_available] < 0).to_numpy()
+            amber = ~red & (frame[col_available] < frame[col_fleet] * 0.1).to_numpy()
+            styles[red, :] = "background-color: #ffcccc"
+            styles[amber, :] = "background-color: #fff3cd"
+            return pd.DataFrame(styles, index=frame.index, columns=frame.columns)
+
+        st.dataframe(df.style.apply(highlight_shortage, axis=None),
                       use_container_width=True, hide_index=True)
     else:
         st.info(T["fleet_no_forecast"])
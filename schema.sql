@@ -24,8 +24,8 @@ CREATE TABLE IF NOT EXISTS deployments (
     project_id INTEGER NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
     venue TEXT NOT NULL,
     location TEXT DEFAULT '',
-    start_date TEXT NOT NULL,
-    end_date TEXT NOT NULL,
+    start_date DATE NOT NULL,
+    end_date DATE NOT NULL,
     device_type_id INTEGER NOT NULL REFERENCES device_types(id),
     default_device_count INTEGER NOT NULL DEFAULT 0,
     app_type TEXT DEFAULT '',
@@ -35,6 +35,19 @@ CREATE TABLE IF NOT EXISTS deployments (
 CREATE TABLE IF NOT EXISTS weekly_allocations (
     id SERIAL PRIMARY KEY,
     deployment_id INTEGER NOT NULL REFERENCES deployments(id) ON DELETE CASCADE,
-    week_start TEXT NOT NULL,
+    week_start DATE NOT NULL,
     device_count INTEGER NOT NULL DEFAULT 0
 );
+
+-- Covers the week-range scan in the fleet usage aggregation.
+CREATE INDEX IF NOT EXISTS ix_wa_week_dep
+    ON weekly_allocations (week_start, deployment_id);
+
+-- Covers the per-deployment allocation fetches and the
+-- project -> deployments join, and backs the regenerate upsert.
+CREATE UNIQUE INDEX IF NOT EXISTS ux_wa_dep_week
+    ON weekly_allocations (deployment_id, week_start);
+CREATE INDEX IF NOT EXISTS ix_dep_project
+    ON deployments (project_id);
+CREATE INDEX IF NOT EXISTS ix_dep_device_type
+    ON deployments (device_type_id);
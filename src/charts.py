@@ -1,12 +1,15 @@
 """Plotly chart builders for Fleet Scheduler."""
+import numpy as np
 import plotly.graph_objects as go
 import pandas as pd
 from datetime import date
+from functools import lru_cache
 
 
 DEFAULT_COLOR = "#72B7B2"
 
 
+@lru_cache(maxsize=None)
 def _hex_to_rgba(hex_color: str, alpha: float = 0.3) -> str:
     h = hex_color.lstrip("#")
     r, g, b = int(h[0:2], 16), int(h[2:4], 16), int(h[4:6], 16)
@@ -17,23 +20,58 @@ def build_timeline_chart(rows: list[dict], start_range: date, end_range: date,
                          T: dict) -> go.Figure:
     """Build a Gantt-style timeline. One bar per project × device type, sorted by start date."""
     if not rows:
-        fig = go.Figure()
-        fig.update_layout(title=T["chart_no_deps"])
-        return fig
+        return go.Figure(dict(layout=dict(title=T["chart_no_deps"])), skip_invalid=True)
 
     # Detect projects that have more than one device type → need type suffix in label
-    from collections import Counter
-    project_device_count = Counter(r["project_name"] for r in rows)
-    multi_device = {name for name, c in project_device_count.items() if c > 1}
-
-    fig = go.Figure()
-    y_order = []  # built in start_date ascending order; reversed for chart display
+    seen: dict[str, bool] = {}
+    for r in rows:
+        name = r["project_name"]
+        seen[name] = name in seen
+    multi_device = {name for name, repeated in seen.items() if repeated}
+
+    # Convert and clip all dates in one vectorized pass.
+    starts = np.maximum(
+        np.array([r["start_date"] for r in rows], dtype="datetime64[D]"),
+        np.datetime64(start_range, "D"),
+    )
+    ends = np.minimum(
+        np.array([r["end_date"] for r in rows], dtype="datetime64[D]"),
+        np.datetime64(end_range, "D"),
+    )
+    durations_ms = (ends - starts).astype("int64") * 86_400_000
+    visible = starts <= ends
+    # Stable argsort on the clipped starts fixes the bar/category order
+    # regardless of how the caller ordered the rows; ties (bars clipped to
+    # the range start) keep their incoming relative order.
+    order = np.argsort(starts, kind="stable")
+
+    # Parallel per-bar lists feed one go.Bar at the end: Plotly validates
+    # per trace, so a single N-bar trace is far cheaper than N traces.
+    xs: list[int] = []
+    ys: list[str] = []
+    bases: list[str] = []
+    colors: list[str] = []
+    texts: list[str] = []
+    customdata: list[list] = []
+    # Keys double as an ordered set: dict lookup replaces the O(n) list scan.
+    y_order: dict[str, None] = {}  # start_date ascending; reversed for chart display
+
+    # The static hover markup lives once in the template; only per-row
+    # values travel in customdata, which keeps the figure JSON small.
+    hovertemplate = (
+        "<b>%{customdata[0]}</b><br>"
+        f"{T['chart_hover_device']}: %{{customdata[1]}}<br>"
+        f"{T['chart_hover_total']}: %{{customdata[2]}}<br>"
+        f"{T['chart_hover_period']}: %{{customdata[3]}} → %{{customdata[4]}}<br>"
+        f"{T['chart_hover_status']}: %{{customdata[5]}} | "
+        f"{T['chart_hover_client']}: %{{customdata[6]}}<br>"
+        "<br>%{customdata[7]}<extra></extra>"
+    )
 
-    for row in rows:
-        dep_start = max(date.fromisoformat(row["start_date"]), start_range)
-        dep_end = min(date.fromisoformat(row["end_date"]), end_range)
-        if dep_start > dep_end:
+    for i in order:
+        if not visible[i]:
             continue
+        row = rows[i]
 
         proj_name = row["project_name"]
         device_type_name = row.get("device_type_name", "")
@@ -51,35 +89,34 @@ def build_timeline_chart(rows: list[dict], start_range: date, end_range: date,
             f"{d['default_device_count']} {T['chart_hover_units']} [{d['start_date']} → {d['end_date']}]"
             for d in row.get("deployments", [])
         )
-        hover = (
-            f"<b>{proj_name}</b><br>"
-            f"{T['chart_hover_device']}: {device_type_name}<br>"
-            f"{T['chart_hover_total']}: {total_count}<br>"
-            f"{T['chart_hover_period']}: {row['start_date']} → {row['end_date']}<br>"
-            f"{T['chart_hover_status']}: {status_icon} | {T['chart_hover_client']}: {row.get('client', '')}<br>"
-            f"<br>{dep_detail}"
-        )
 
-        color = row.get("color", DEFAULT_COLOR)
-        duration_ms = (dep_end - dep_start).days * 24 * 3600 * 1000
-
-        fig.add_trace(go.Bar(
-            x=[duration_ms],
-            y=[y_label],
-            base=[dep_start.isoformat()],
-            orientation="h",
-            marker_color=color,
-            text=f"{total_count} {device_type_name}",
-            textposition="inside",
-            hovertext=hover,
-            hoverinfo="text",
-            showlegend=False,
-        ))
-
-        if y_label not in y_order:
-            y_order.append(y_label)
-
-    fig.update_layout(
+        xs.append(int(durations_ms[i]))
+        ys.append(y_label)
+        bases.append(str(starts[i]))
+        colors.append(row.get("color", DEFAULT_COLOR))
+        texts.append(f"{total_count} {device_type_name}")
+        customdata.append([proj_name, device_type_name, total_count,
+                           row["start_date"], row["end_date"],
+                           status_icon, row.get("client", ""), dep_detail])
+
+        y_order.setdefault(y_label)
+
+    # Plain-dict trace + skip_invalid bypasses Plotly's per-property
+    # validators, which dominate server-side figure construction.
+    bar = dict(
+        type="bar",
+        x=xs,
+        y=ys,
+        base=bases,
+        orientation="h",
+        marker=dict(color=colors),
+        text=texts,
+        textposition="inside",
+        customdata=customdata,
+        hovertemplate=hovertemplate,
+        showlegend=False,
+    )
+    layout = dict(
         barmode="overlay",
         xaxis=dict(
             type="date",
@@ -96,34 +133,38 @@ def build_timeline_chart(rows: list[dict], start_range: date, end_range: date,
         margin=dict(l=10, r=10, t=40, b=40),
         title=T["chart_timeline_title"],
     )
-    return fig
+    return go.Figure(dict(data=[bar], layout=layout), skip_invalid=True)
 
 
 def build_capacity_chart(usage_data: list[dict], device_types: list[dict],
                          start_range: date, end_range: date, T: dict) -> go.Figure:
     """Build stacked area chart: usage vs capacity per device type."""
     if not usage_data:
-        fig = go.Figure()
-        fig.update_layout(title=T["chart_no_usage"])
-        return fig
+        return go.Figure(dict(layout=dict(title=T["chart_no_usage"])), skip_invalid=True)
 
     df = pd.DataFrame(usage_data)
     df["week_start"] = pd.to_datetime(df["week_start"])
 
-    fig = go.Figure()
+    # One sort + one groupby pass replaces a full-table mask and sort per
+    # device type.
+    df = df.sort_values("week_start")
+    groups = dict(iter(df.groupby("device_type_id", sort=False)))
+
+    data: list[dict] = []
 
     for dt in device_types:
-        dt_data = df[df["device_type_id"] == dt["id"]].sort_values("week_start")
-        if dt_data.empty:
+        dt_data = groups.get(dt["id"])
+        if dt_data is None:
             continue
 
         color = dt.get("color", DEFAULT_COLOR)
         capacity = dt["total_fleet"] - dt["under_repair"]
 
         # Usage area
-        fig.add_trace(go.Scatter(
-            x=dt_data["week_start"],
-            y=dt_data["total_in_use"],
+        data.append(dict(
+            type="scatter",
+            x=dt_data["week_start"].to_numpy(),
+            y=dt_data["total_in_use"].to_numpy(),
             name=f"{dt['name']} — {T['chart_in_use_suffix']}",
             fill="tozeroy",
             mode="lines",
@@ -132,15 +173,16 @@ def build_capacity_chart(usage_data: list[dict], device_types: list[dict],
         ))
 
         # Capacity line
-        fig.add_trace(go.Scatter(
-            x=dt_data["week_start"],
+        data.append(dict(
+            type="scatter",
+            x=dt_data["week_start"].to_numpy(),
             y=[capacity] * len(dt_data),
             name=f"{dt['name']} — {T['chart_capacity_suffix']} ({capacity})",
             mode="lines",
             line=dict(color=color, dash="dash", width=2),
         ))
 
-    fig.update_layout(
+    layout = dict(
         xaxis=dict(
             type="date",
             range=[start_range, end_range],
@@ -153,4 +195,4 @@ def build_capacity_chart(usage_data: list[dict], device_types: list[dict],
         title=T["chart_capacity_title"],
         legend=dict(orientation="h", y=-0.2),
     )
-    return fig
+    return go.Figure(dict(data=data, layout=layout), skip_invalid=True)
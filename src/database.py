@@ -4,6 +4,7 @@ Connection string read from st.secrets["database"]["url"].
 Uses a ThreadedConnectionPool cached with st.cache_resource — connections
 are reused across reruns instead of opened/closed per call.
 """
+import pandas as pd
 import psycopg2
 import psycopg2.extras
 import psycopg2.pool
@@ -16,8 +17,8 @@ from typing import Optional
 @st.cache_resource
 def _pool() -> psycopg2.pool.ThreadedConnectionPool:
     return psycopg2.pool.ThreadedConnectionPool(
-        minconn=1,
-        maxconn=5,
+        minconn=2,
+        maxconn=10,
         dsn=st.secrets["database"]["url"],
     )
 
@@ -39,19 +40,40 @@ def _cur(conn) -> psycopg2.extras.RealDictCursor:
     return conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
 
+# ---------------------------------------------------------------------------
+# Cache invalidation helpers — mutators clear only the caches their write
+# can actually stale, so unrelated cached reads survive.
+# ---------------------------------------------------------------------------
+
+def _clear_usage_caches():
+    get_fleet_usage_by_week.clear()
+    get_fleet_usage_by_week_df.clear()
+    get_shortages.clear()
+
+
+def _clear_allocation_caches():
+    get_all_weekly_allocations.clear()
+    get_weekly_allocations_for_deployments.clear()
+    get_allocation_frames.clear()
+    _clear_usage_caches()  # usage aggregates are sums over allocations
+
+
+@st.cache_resource
 def init_db():
-    """Create tables if they don't exist. Safe to call on every startup."""
+    """Create tables if they don't exist. Cached so the DDL runs once per
+    process, not on every session startup; the statements themselves stay
+    idempotent for the first run against an existing database."""
     with get_connection() as conn:
         cur = conn.cursor()
+        # One execute for all static DDL — a single round trip to Supabase.
         cur.execute("""
             CREATE TABLE IF NOT EXISTS device_types (
                 id SERIAL PRIMARY KEY,
                 name TEXT NOT NULL UNIQUE,
                 total_fleet INTEGER NOT NULL DEFAULT 0,
                 under_repair INTEGER NOT NULL DEFAULT 0
-            )
-        """)
-        cur.execute("""
+            );
+
             CREATE TABLE IF NOT EXISTS projects (
                 id SERIAL PRIMARY KEY,
                 name TEXT NOT NULL,
@@ -60,52 +82,67 @@ def init_db():
                 status TEXT DEFAULT '◎',
                 entity TEXT DEFAULT 'AGJ',
                 notes TEXT DEFAULT ''
-            )
-        """)
-        # Safe migration: add archived column if it doesn't exist yet
-        cur.execute("""
+            );
+
+            -- Safe migration: add archived column if it doesn't exist yet
             ALTER TABLE projects
-            ADD COLUMN IF NOT EXISTS archived BOOLEAN NOT NULL DEFAULT FALSE
-        """)
-        cur.execute("""
+            ADD COLUMN IF NOT EXISTS archived BOOLEAN NOT NULL DEFAULT FALSE;
+
             CREATE TABLE IF NOT EXISTS deployments (
                 id SERIAL PRIMARY KEY,
                 project_id INTEGER NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
                 venue TEXT NOT NULL,
                 location TEXT DEFAULT '',
-                start_date TEXT NOT NULL,
-                end_date TEXT NOT NULL,
+                start_date DATE NOT NULL,
+                end_date DATE NOT NULL,
                 device_type_id INTEGER NOT NULL REFERENCES device_types(id),
                 default_device_count INTEGER NOT NULL DEFAULT 0,
                 app_type TEXT DEFAULT '',
                 notes TEXT DEFAULT ''
-            )
-        """)
-        cur.execute("""
+            );
+
             CREATE TABLE IF NOT EXISTS weekly_allocations (
                 id SERIAL PRIMARY KEY,
                 deployment_id INTEGER NOT NULL REFERENCES deployments(id) ON DELETE CASCADE,
-                week_start TEXT NOT NULL,
+                week_start DATE NOT NULL,
                 device_count INTEGER NOT NULL DEFAULT 0
+            );
+        """)
+        # Safe migration: earlier schemas stored dates as ISO-8601 TEXT.
+        # Native DATE columns give index-range scans and hand callers
+        # datetime.date objects directly.
+        cur.execute("""
+            SELECT table_name, column_name FROM information_schema.columns
+            WHERE table_schema = 'public'
+              AND table_name IN ('deployments', 'weekly_allocations')
+              AND column_name IN ('start_date', 'end_date', 'week_start')
+              AND data_type = 'text'
+        """)
+        for table, column in cur.fetchall():
+            cur.execute(
+                f"ALTER TABLE public.{table} ALTER COLUMN {column} TYPE date USING {column}::date"
             )
+        cur.execute("""
+            -- Covers the week-range scan in the fleet usage aggregation.
+            CREATE INDEX IF NOT EXISTS ix_wa_week_dep
+            ON weekly_allocations (week_start, deployment_id);
+
+            -- Covers the per-deployment allocation fetches and the
+            -- project -> deployments join, and backs the regenerate upsert.
+            -- Replaces the earlier non-unique ix_wa_dep_week.
+            DROP INDEX IF EXISTS ix_wa_dep_week;
+            CREATE UNIQUE INDEX IF NOT EXISTS ux_wa_dep_week
+            ON weekly_allocations (deployment_id, week_start);
+
+            CREATE INDEX IF NOT EXISTS ix_dep_project
+            ON deployments (project_id);
+            CREATE INDEX IF NOT EXISTS ix_dep_device_type
+            ON deployments (device_type_id);
         """)
         conn.commit()
         cur.close()
 
 
-# ---------------------------------------------------------------------------
-# Helper: generate Monday-aligned weeks between two dates
-# ---------------------------------------------------------------------------
-
-def _week_mondays(start: date, end: date) -> list[date]:
-    monday = start - timedelta(days=start.weekday())
-    weeks = []
-    while monday <= end:
-        weeks.append(monday)
-        monday += timedelta(days=7)
-    return weeks
-
-
 # ---------------------------------------------------------------------------
 # Device Types CRUD
 # ---------------------------------------------------------------------------
@@ -126,6 +163,18 @@ def get_device_type(device_type_id: int) -> Optional[dict]:
         return dict(row) if row else None
 
 
+def get_device_types_by_ids(device_type_ids: list[int]) -> dict[int, dict]:
+    """Batch lookup keyed by id — one query instead of a get_device_type
+    round trip per id."""
+    if not device_type_ids:
+        return {}
+    with get_connection() as conn:
+        cur = _cur(conn)
+        cur.execute("SELECT * FROM device_types WHERE id = ANY(%s)",
+                    (list(device_type_ids),))
+        return {r["id"]: dict(r) for r in cur.fetchall()}
+
+
 def create_device_type(name: str, total_fleet: int, under_repair: int = 0,
                        color: str = "#4C78A8") -> int:
     with get_connection() as conn:
@@ -151,6 +200,8 @@ def update_device_type(device_type_id: int, name: str, total_fleet: int,
         )
         conn.commit()
         get_device_types.clear()
+        get_deployments.clear()  # device_type_name/color are joined into deployment rows
+        _clear_usage_caches()  # total_fleet/under_repair are embedded in usage rows
 
 
 def delete_device_type(device_type_id: int):
@@ -159,6 +210,9 @@ def delete_device_type(device_type_id: int):
         cur.execute("DELETE FROM device_types WHERE id = %s", (device_type_id,))
         conn.commit()
         get_device_types.clear()
+        get_deployments.clear()
+        get_project_venue_blobs.clear()
+        _clear_usage_caches()
 
 
 # ---------------------------------------------------------------------------
@@ -173,7 +227,14 @@ def get_projects(include_archived: bool = False) -> list[dict]:
             cur.execute("SELECT * FROM projects ORDER BY name")
         else:
             cur.execute("SELECT * FROM projects WHERE archived = FALSE ORDER BY name")
-        return [dict(r) for r in cur.fetchall()]
+        rows = [dict(r) for r in cur.fetchall()]
+    # Precompute the lowercase search haystack once per cache window so the
+    # Projects filter doesn't re-lowercase four fields per keystroke.
+    for p in rows:
+        p["_search"] = "\n".join(
+            filter(None, [p["name"], p.get("name_en"), p.get("client"), p.get("notes")])
+        ).lower()
+    return rows
 
 
 def get_project(project_id: int) -> Optional[dict]:
@@ -209,6 +270,7 @@ def update_project(project_id: int, **kwargs):
         cur.execute(f"UPDATE projects SET {sets} WHERE id = %s", vals)
         conn.commit()
         get_projects.clear()
+        get_deployments.clear()  # project_name is joined into deployment rows
 
 
 def archive_project(project_id: int):
@@ -235,6 +297,9 @@ def delete_project(project_id: int):
         cur.execute("DELETE FROM projects WHERE id = %s", (project_id,))
         conn.commit()
         get_projects.clear()
+        get_deployments.clear()  # ON DELETE CASCADE removes this project's deployments
+        get_project_venue_blobs.clear()
+        _clear_allocation_caches()
 
 
 # ---------------------------------------------------------------------------
@@ -243,7 +308,17 @@ def delete_project(project_id: int):
 
 @st.cache_data(ttl=120)
 def get_deployments(project_id: Optional[int] = None,
-                    include_archived: bool = False) -> list[dict]:
+                    include_archived: bool = False,
+                    start: Optional[date] = None,
+                    end: Optional[date] = None,
+                    device_type_ids: Optional[list[int]] = None,
+                    statuses: Optional[list[str]] = None,
+                    search: Optional[str] = None) -> list[dict]:
+    """Fetch deployments with optional filters pushed into SQL.
+
+    start/end select deployments whose date range overlaps [start, end].
+    search matches venue or project name, case-insensitively.
+    """
     with get_connection() as conn:
         cur = _cur(conn)
         conditions = []
@@ -253,9 +328,25 @@ def get_deployments(project_id: Optional[int] = None,
             params.append(project_id)
         if not include_archived:
             conditions.append("p.archived = FALSE")
+        if start is not None:
+            conditions.append("d.end_date >= %s")
+            params.append(start)
+        if end is not None:
+            conditions.append("d.start_date <= %s")
+            params.append(end)
+        if device_type_ids is not None:
+            conditions.append("d.device_type_id = ANY(%s)")
+            params.append(list(device_type_ids))
+        if statuses is not None:
+            conditions.append("p.status = ANY(%s)")
+            params.append(list(statuses))
+        if search:
+            conditions.append("(d.venue ILIKE %s OR p.name ILIKE %s)")
+            like = f"%{search}%"
+            params.extend([like, like])
         where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
         cur.execute(
-            f"""SELECT d.*, p.name as project_name,
+            f"""SELECT d.*, p.name as project_name, p.status as status, p.client as client,
                       dt.name as device_type_name, dt.color as device_type_color
                FROM deployments d
                JOIN projects p ON d.project_id = p.id
@@ -267,29 +358,50 @@ def get_deployments(project_id: Optional[int] = None,
         return [dict(r) for r in cur.fetchall()]
 
 
+@st.cache_data(ttl=120)
+def get_project_venue_blobs() -> dict[int, str]:
+    """One lowercase venue+location search string per project, aggregated by
+    the database so the Projects search does a single substring test."""
+    with get_connection() as conn:
+        cur = _cur(conn)
+        cur.execute(
+            "SELECT project_id, "
+            "STRING_AGG(LOWER(venue || ' ' || COALESCE(location, '')), '|') AS blob "
+            "FROM deployments GROUP BY project_id"
+        )
+        return {r["project_id"]: r["blob"] for r in cur.fetchall()}
+
+
 def create_deployment(project_id: int, venue: str, location: str,
                       start_date: date, end_date: date, device_type_id: int,
                       default_device_count: int, app_type: str = "",
                       notes: str = "") -> int:
+    monday = start_date - timedelta(days=start_date.weekday())
     with get_connection() as conn:
         cur = conn.cursor()
+        # Deployment row and its week allocations land in one statement:
+        # the CTE feeds the returned id into a generate_series insert.
         cur.execute(
-            """INSERT INTO deployments
-               (project_id, venue, location, start_date, end_date, device_type_id,
-                default_device_count, app_type, notes)
-               VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) RETURNING id""",
-            (project_id, venue, location, str(start_date), str(end_date),
-             device_type_id, default_device_count, app_type, notes)
+            """WITH d AS (
+                   INSERT INTO deployments
+                   (project_id, venue, location, start_date, end_date, device_type_id,
+                    default_device_count, app_type, notes)
+                   VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) RETURNING id
+               ), a AS (
+                   INSERT INTO weekly_allocations (deployment_id, week_start, device_count)
+                   SELECT d.id, gs::date, %s
+                   FROM d, generate_series(%s::date, %s::date, interval '7 days') gs
+               )
+               SELECT id FROM d""",
+            (project_id, venue, location, start_date, end_date,
+             device_type_id, default_device_count, app_type, notes,
+             default_device_count, monday, end_date)
         )
         deployment_id = cur.fetchone()[0]
-        for monday in _week_mondays(start_date, end_date):
-            cur.execute(
-                "INSERT INTO weekly_allocations (deployment_id, week_start, device_count) VALUES (%s, %s, %s)",
-                (deployment_id, str(monday), default_device_count)
-            )
         conn.commit()
         get_deployments.clear()
-        get_all_weekly_allocations.clear()
+        get_project_venue_blobs.clear()
+        _clear_allocation_caches()
         return deployment_id
 
 
@@ -303,6 +415,7 @@ def update_deployment(deployment_id: int, **kwargs):
         cur.execute(f"UPDATE deployments SET {sets} WHERE id = %s", vals)
         conn.commit()
         get_deployments.clear()
+        get_project_venue_blobs.clear()
 
 
 def delete_deployment(deployment_id: int):
@@ -311,7 +424,8 @@ def delete_deployment(deployment_id: int):
         cur.execute("DELETE FROM deployments WHERE id = %s", (deployment_id,))
         conn.commit()
         get_deployments.clear()
-        get_all_weekly_allocations.clear()
+        get_project_venue_blobs.clear()
+        _clear_allocation_caches()
 
 
 # ---------------------------------------------------------------------------
@@ -336,15 +450,88 @@ def get_all_weekly_allocations() -> dict[int, list[dict]]:
         return result
 
 
+@st.cache_data(ttl=120)
+def get_weekly_allocations_for_deployments(deployment_ids: list[int]) -> dict[int, list[dict]]:
+    """Allocations for the given deployments only, grouped by deployment_id.
+    Scoped alternative to get_all_weekly_allocations() for filtered views."""
+    if not deployment_ids:
+        return {}
+    with get_connection() as conn:
+        cur = _cur(conn)
+        cur.execute(
+            "SELECT * FROM weekly_allocations WHERE deployment_id = ANY(%s) "
+            "ORDER BY deployment_id, week_start",
+            (list(deployment_ids),)
+        )
+        result: dict[int, list[dict]] = {}
+        for row in cur.fetchall():
+            d = dict(row)
+            result.setdefault(d["deployment_id"], []).append(d)
+        return result
+
+
+@st.cache_data(ttl=120)
+def get_allocation_frames(deployment_ids: list[int]) -> dict[int, pd.DataFrame]:
+    """Display-ready allocation DataFrames keyed by deployment_id.
+
+    Built once per cache window so st.data_editor receives a stable frame
+    instead of one reconstructed from row dicts on every rerun.
+    """
+    frames: dict[int, pd.DataFrame] = {}
+    for dep_id, allocations in get_weekly_allocations_for_deployments(deployment_ids).items():
+        df = pd.DataFrame(allocations)[["id", "week_start", "device_count"]]
+        # Format the DATE values straight to ISO strings for the editor's
+        # read-only week column
+        df["week_start"] = df["week_start"].astype(str)
+        frames[dep_id] = df
+    return frames
+
+
 def update_weekly_allocation(allocation_id: int, device_count: int):
+    # Hot path from the allocation editor: PREPARE once per pooled
+    # connection so repeat calls skip the server-side parse/plan.
+    # PREPARE is session-scoped, which assumes a direct or session-mode
+    # connection; a transaction-mode pooler (pgbouncer/supavisor) may hand
+    # the statement's session to someone else, so a missing statement is
+    # treated as "prepare again", never as an error.
+    prepare_sql = ("PREPARE upd_wa AS "
+                   "UPDATE weekly_allocations SET device_count = $1 WHERE id = $2")
     with get_connection() as conn:
         cur = conn.cursor()
-        cur.execute(
+        if not getattr(conn, "_wa_update_prepared", False):
+            cur.execute(prepare_sql)
+        try:
+            cur.execute("EXECUTE upd_wa (%s, %s)", (device_count, allocation_id))
+        except psycopg2.errors.InvalidSqlStatementName:
+            # The statement vanished (a rolled-back first transaction
+            # deallocates the PREPARE, and poolers can swap sessions):
+            # start clean, re-prepare and retry once.
+            conn.rollback()
+            cur = conn.cursor()
+            cur.execute(prepare_sql)
+            cur.execute("EXECUTE upd_wa (%s, %s)", (device_count, allocation_id))
+        conn.commit()
+        # Flag only after the commit — PREPARE is transactional, so
+        # flagging earlier would survive a rollback that the statement
+        # itself does not.
+        conn._wa_update_prepared = True
+        _clear_allocation_caches()
+
+
+def update_weekly_allocations_batch(pairs: list[tuple[int, int]]):
+    """Apply many (device_count, allocation_id) updates in one transaction."""
+    if not pairs:
+        return
+    with get_connection() as conn:
+        cur = conn.cursor()
+        psycopg2.extras.execute_batch(
+            cur,
             "UPDATE weekly_allocations SET device_count = %s WHERE id = %s",
-            (device_count, allocation_id)
+            pairs,
+            page_size=100,
         )
         conn.commit()
-        get_all_weekly_allocations.clear()
+        _clear_allocation_caches()
 
 
 def bulk_update_allocations_from(deployment_id: int, new_count: int, from_date: date):
@@ -354,63 +541,133 @@ def bulk_update_allocations_from(deployment_id: int, new_count: int, from_date:
         cur.execute(
             "UPDATE weekly_allocations SET device_count = %s "
             "WHERE deployment_id = %s AND week_start >= %s",
-            (new_count, deployment_id, str(from_date))
+            (new_count, deployment_id, from_date)
         )
         conn.commit()
-        get_all_weekly_allocations.clear()
+        _clear_allocation_caches()
 
 
 def regenerate_weekly_allocations(deployment_id: int, start_date: date,
                                   end_date: date, default_count: int):
+    """Align allocation rows to the deployment's date range: drop weeks
+    outside it, insert missing weeks at the default count, and leave
+    existing rows — including manual overrides — untouched."""
+    monday = start_date - timedelta(days=start_date.weekday())
     with get_connection() as conn:
         cur = conn.cursor()
-        cur.execute("DELETE FROM weekly_allocations WHERE deployment_id = %s", (deployment_id,))
-        for monday in _week_mondays(start_date, end_date):
-            cur.execute(
-                "INSERT INTO weekly_allocations (deployment_id, week_start, device_count) VALUES (%s, %s, %s)",
-                (deployment_id, str(monday), default_count)
-            )
+        cur.execute(
+            "DELETE FROM weekly_allocations "
+            "WHERE deployment_id = %s AND (week_start < %s OR week_start > %s)",
+            (deployment_id, monday, end_date)
+        )
+        # generate_series builds the Monday list server-side, so the whole
+        # range inserts in one statement with no per-week parameters.
+        cur.execute(
+            """INSERT INTO weekly_allocations (deployment_id, week_start, device_count)
+               SELECT %s, gs::date, %s
+               FROM generate_series(%s::date, %s::date, interval '7 days') gs
+               ON CONFLICT (deployment_id, week_start) DO NOTHING""",
+            (deployment_id, default_count, monday, end_date)
+        )
         conn.commit()
-        get_all_weekly_allocations.clear()
+        _clear_allocation_caches()
 
 
 # ---------------------------------------------------------------------------
 # Fleet Queries (aggregation)
 # ---------------------------------------------------------------------------
 
+def _fleet_usage_query(start_date: date, end_date: date,
+                       device_type_id: Optional[int] = None) -> tuple[str, list]:
+    query = """
+        SELECT wa.week_start, dt.id as device_type_id, dt.name as device_type_name,
+               dt.total_fleet, dt.under_repair,
+               SUM(wa.device_count) as total_in_use,
+               (dt.total_fleet - dt.under_repair - SUM(wa.device_count))::int as available
+        FROM weekly_allocations wa
+        JOIN deployments d ON wa.deployment_id = d.id
+        JOIN device_types dt ON d.device_type_id = dt.id
+        WHERE wa.week_start >= %s AND wa.week_start <= %s
+    """
+    params: list = [start_date, end_date]
+
+    if device_type_id:
+        query += " AND dt.id = %s"
+        params.append(device_type_id)
+
+    query += " GROUP BY wa.week_start, dt.id, dt.name, dt.total_fleet, dt.under_repair ORDER BY wa.week_start, dt.name"
+    return query, params
+
+
+@st.cache_data(ttl=120)
 def get_fleet_usage_by_week(start_date: date, end_date: date,
                             device_type_id: Optional[int] = None) -> list[dict]:
+    query, params = _fleet_usage_query(start_date, end_date, device_type_id)
     with get_connection() as conn:
         cur = _cur(conn)
-        query = """
-            SELECT wa.week_start, dt.id as device_type_id, dt.name as device_type_name,
-                   dt.total_fleet, dt.under_repair,
-                   SUM(wa.device_count) as total_in_use
-            FROM weekly_allocations wa
-            JOIN deployments d ON wa.deployment_id = d.id
-            JOIN device_types dt ON d.device_type_id = dt.id
-            WHERE wa.week_start >= %s AND wa.week_start <= %s
-        """
-        params: list = [str(start_date), str(end_date)]
-
-        if device_type_id:
-            query += " AND dt.id = %s"
-            params.append(device_type_id)
-
-        query += " GROUP BY wa.week_start, dt.id, dt.name, dt.total_fleet, dt.under_repair ORDER BY wa.week_start, dt.name"
+        cur.execute(query, params)
+        return [dict(r) for r in cur.fetchall()]
+
 
+@st.cache_data(ttl=120)
+def get_fleet_usage_by_week_df(start_date: date, end_date: date,
+                               device_type_id: Optional[int] = None) -> pd.DataFrame:
+    """DataFrame variant of get_fleet_usage_by_week for callers that build
+    one anyway — a plain tuple cursor feeds from_records directly, with
+    no per-row dict materialization at all."""
+    query, params = _fleet_usage_query(start_date, end_date, device_type_id)
+    with get_connection() as conn:
+        cur = conn.cursor()
         cur.execute(query, params)
-        rows = cur.fetchall()
+        return pd.DataFrame.from_records(
+            cur.fetchall(), columns=[c.name for c in cur.description])
 
-    result = []
-    for r in rows:
-        d = dict(r)
-        d["available"] = d["total_fleet"] - d["under_repair"] - d["total_in_use"]
-        result.append(d)
-    return result
+
+@st.cache_data(ttl=120)
+def get_shortages(start_date: date, end_date: date) -> list[dict]:
+    """Weeks where a device type is over-allocated or within 10% of its
+    fleet. The shortage predicate runs in SQL (HAVING on the aggregate)
+    so only the problem rows cross the wire; `severity` is 'alert' for a
+    negative balance and 'warn' for low stock."""
+    query = """
+        SELECT wa.week_start, dt.id as device_type_id, dt.name as device_type_name,
+               dt.total_fleet, dt.under_repair,
+               SUM(wa.device_count) as total_in_use,
+               dt.total_fleet - dt.under_repair - SUM(wa.device_count) as available,
+               CASE WHEN dt.total_fleet - dt.under_repair - SUM(wa.device_count) < 0
+                    THEN 'alert' ELSE 'warn' END as severity
+        FROM weekly_allocations wa
+        JOIN deployments d ON wa.deployment_id = d.id
+        JOIN device_types dt ON d.device_type_id = dt.id
+        WHERE wa.week_start >= %s AND wa.week_start <= %s
+        GROUP BY wa.week_start, dt.id, dt.name, dt.total_fleet, dt.under_repair
+        HAVING dt.total_fleet - dt.under_repair - SUM(wa.device_count) < dt.total_fleet * 0.1
+        ORDER BY wa.week_start, dt.name
+    """
+    with get_connection() as conn:
+        cur = _cur(conn)
+        cur.execute(query, [start_date, end_date])
+        return [dict(r) for r in cur.fetchall()]
 
 
 def get_fleet_summary_current_week() -> list[dict]:
+    """Usage for the current week only — a single-key equality lookup on
+    the week index instead of the range-scan plan of the ranged query."""
     today = date.today()
     monday = today - timedelta(days=today.weekday())
-    return get_fleet_usage_by_week(monday, monday)
+    query = """
+        SELECT wa.week_start, dt.id as device_type_id, dt.name as device_type_name,
+               dt.total_fleet, dt.under_repair,
+               SUM(wa.device_count) as total_in_use,
+               (dt.total_fleet - dt.under_repair - SUM(wa.device_count))::int as available
+        FROM weekly_allocations wa
+        JOIN deployments d ON wa.deployment_id = d.id
+        JOIN device_types dt ON d.device_type_id = dt.id
+        WHERE wa.week_start = %s
+        GROUP BY wa.week_start, dt.id, dt.name, dt.total_fleet, dt.under_repair
+        ORDER BY dt.name
+    """
+    with get_connection() as conn:
+        cur = _cur(conn)
+        cur.execute(query, [monday])
+        return [dict(r) for r in cur.fetchall()]
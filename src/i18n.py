@@ -330,4 +330,9 @@ JA: dict = {
 
 
 def get_translations(lang: str) -> dict:
+    """Return the translation dict for a locale.
+
+    EN/JA are module-level constants built once at import, so this is a
+    reference lookup — no per-rerun construction or file I/O to cache.
+    """
     return JA if lang == "ja" else EN
@@ -1,10 +1,10 @@
 """Dataclasses for Fleet Scheduler entities."""
-from dataclasses import dataclass, field
+from dataclasses import dataclass
 from datetime import date
 from typing import Optional
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class DeviceType:
     id: Optional[int] = None
     name: str = ""
@@ -12,7 +12,7 @@ class DeviceType:
     under_repair: int = 0
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Project:
     id: Optional[int] = None
     name: str = ""
@@ -23,7 +23,7 @@ class Project:
     notes: str = ""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Deployment:
     id: Optional[int] = None
     project_id: Optional[int] = None
@@ -37,7 +37,7 @@ class Deployment:
     notes: str = ""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class WeeklyAllocation:
     id: Optional[int] = None
     deployment_id: Optional[int] = None